@@ -38,6 +38,17 @@ except Exception as e:
     print(f"✗ Failed to download OpenCLIP: {e}")
     sys.exit(1)
 
+# Convert the CLIP checkpoint to safetensors so the handlers can mmap the
+# weights straight from the image layer at cold start
+clip_safetensors = os.environ.get("CLIP_SAFETENSORS", "/app/clip_vit_b32.safetensors")
+print(f"\nConverting CLIP weights to safetensors: {clip_safetensors}")
+try:
+    from safetensors.torch import save_file
+    save_file(model.state_dict(), clip_safetensors)
+    print("✓ CLIP weights converted")
+except Exception as e:
+    print(f"⚠ safetensors conversion skipped (will load the .bin instead): {e}")
+
 print("\n" + "=" * 70)
 print("ALL MODELS CACHED SUCCESSFULLY")
 print("=" * 70)
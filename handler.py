@@ -14,13 +14,27 @@ from sentence_transformers import SentenceTransformer
 import open_clip
 from PIL import Image
 import requests
+from requests.adapters import HTTPAdapter, Retry
+import numpy as np
+import base64
+from collections import OrderedDict
 from io import BytesIO
+import concurrent.futures
+import atexit
+import os
+import queue
+import threading
 import time
 
 print("=" * 70)
 print("INITIALIZING VECTOR ENCODING SERVICE")
 print("=" * 70)
 
+# Inference-only service: allow TF32 tensor-core matmul and cuDNN autotuning
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+torch.backends.cudnn.benchmark = True
+
 # Check GPU availability
 device = "cuda" if torch.cuda.is_available() else "cpu"
 print(f"\nDevice: {device}")
@@ -28,6 +42,12 @@ if torch.cuda.is_available():
     print(f"GPU: {torch.cuda.get_device_name(0)}")
     print(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
 
+# torch.multiprocessing spawn workers (the multi-GPU text pool) re-execute
+# this module as "__mp_main__" during bootstrap; they only need the
+# SentenceTransformer, so every CLIP/compile/CUDA-graph init below is
+# skipped for them
+IS_POOL_WORKER = __name__ == "__mp_main__"
+
 # Load Sentence Transformer
 print("\n[1/2] Loading Sentence Transformer...")
 start = time.time()
@@ -36,154 +56,530 @@ sentence_model = sentence_model.to(device)
 print(f"✓ Loaded in {time.time() - start:.2f}s")
 print(f"  Dimensions: {sentence_model.get_sentence_embedding_dimension()}")
 
-# Load OpenCLIP
-print("\n[2/2] Loading OpenCLIP...")
-start = time.time()
-clip_model, _, clip_preprocess = open_clip.create_model_and_transforms(
-    'ViT-B-32',
-    pretrained='laion2b_s34b_b79k'
+# On CPU (cold-start fallback or CPU-only workers), dynamically quantize the
+# MiniLM Linear layers so matmuls run on INT8 fbgemm/qnnpack kernels —
+# accuracy loss is negligible for similarity use. GPU keeps FP16/TF32.
+if device == "cpu":
+    try:
+        st_module = sentence_model._first_module()
+        st_module.auto_model = torch.quantization.quantize_dynamic(
+            st_module.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        print("✓ MiniLM quantized to dynamic INT8 for CPU")
+    except Exception as e:
+        print(f"⚠ INT8 quantization unavailable, staying FP32: {e}")
+
+# The Rust "fast" tokenizer matters a lot for short inputs; warn loudly if
+# the slow Python one got loaded (usually a broken `tokenizers` install)
+if not getattr(sentence_model.tokenizer, "is_fast", False):
+    print("⚠ Slow Python tokenizer in use — install 'tokenizers' for the Rust one")
+
+# On multi-GPU workers, shard very large text batches across devices with
+# sentence-transformers' worker-process pool; small batches stay local.
+# The pool must NOT start at import: its workers are spawned via
+# torch.multiprocessing, re-import this module during bootstrap, and with a
+# top-level start would recursively reload models and spawn pools of their
+# own — so it is created lazily from request context on first use.
+MULTI_GPU_MIN_BATCH = 256
+st_pool = None
+st_pool_tried = False
+st_pool_lock = threading.Lock()
+
+
+def get_st_pool():
+    """Start (at most once) and return the multi-GPU encode pool, or None."""
+    global st_pool, st_pool_tried
+    if torch.cuda.device_count() <= 1:
+        return None
+    with st_pool_lock:
+        if not st_pool_tried:
+            st_pool_tried = True
+            try:
+                st_pool = sentence_model.start_multi_process_pool()
+                atexit.register(sentence_model.stop_multi_process_pool, st_pool)
+                print(f"✓ Multi-GPU encode pool across {torch.cuda.device_count()} GPUs")
+            except Exception as e:
+                print(f"⚠ Multi-GPU pool unavailable: {e}")
+        return st_pool
+
+# Load OpenCLIP — skipped in text pool workers, which never touch the image
+# paths and must not duplicate CLIP on the serving device
+clip_model = None
+clip_preprocess = None
+clip_tokenizer = None
+clip_dtype = torch.float16 if device == "cuda" else torch.float32
+if not IS_POOL_WORKER:
+    print("\n[2/2] Loading OpenCLIP...")
+    start = time.time()
+    # Prefer the safetensors checkpoint baked in by download_models.py: it is
+    # mmap'ed from the image layer instead of unpickled and eagerly copied,
+    # which cuts cold-start load time considerably
+    CLIP_SAFETENSORS = os.environ.get("CLIP_SAFETENSORS", "/app/clip_vit_b32.safetensors")
+    if os.path.exists(CLIP_SAFETENSORS):
+        from safetensors.torch import load_file
+        clip_model, _, clip_preprocess = open_clip.create_model_and_transforms('ViT-B-32')
+        clip_model.load_state_dict(load_file(CLIP_SAFETENSORS))
+        print(f"  (weights mmap'ed from {CLIP_SAFETENSORS})")
+    else:
+        clip_model, _, clip_preprocess = open_clip.create_model_and_transforms(
+            'ViT-B-32',
+            pretrained='laion2b_s34b_b79k'
+        )
+    clip_tokenizer = open_clip.get_tokenizer('ViT-B-32')
+    clip_model.eval()
+    clip_model.requires_grad_(False)
+    clip_model = clip_model.to(device)
+
+    # FP16 weights on GPU: ViT-B/32 is GEMM-bound and maps straight onto
+    # tensor cores. The L2 normalization stays in FP32 for accuracy.
+    if device == "cuda":
+        clip_model = clip_model.half()
+        # NHWC strides for the patch-embedding conv; transformer blocks are
+        # layout-agnostic but inherit the cheaper input path
+        clip_model = clip_model.to(memory_format=torch.channels_last)
+    print(f"✓ Loaded in {time.time() - start:.2f}s")
+
+
+def to_clip_layout(tensor):
+    """Match CLIP's memory format (NHWC on GPU, default layout on CPU)."""
+    if device == "cuda":
+        return tensor.contiguous(memory_format=torch.channels_last)
+    return tensor
+
+# Dedicated stream for host→device copies so image uploads overlap GPU compute
+copy_stream = torch.cuda.Stream() if device == "cuda" and not IS_POOL_WORKER else None
+
+# Images per pipeline chunk in batch encoding
+IMAGE_CHUNK_SIZE = 8
+
+# Set LATENCY_METRICS=0 to strip timing from the hot path entirely
+LATENCY_METRICS = os.environ.get("LATENCY_METRICS", "1") != "0"
+
+# Sub-batch size for multi-text encodes. sentence-transformers sorts inputs
+# by token length and encodes in batches of this size, so heterogeneous
+# batches pad each sub-batch only to its own longest member
+TEXT_ENCODE_BATCH_SIZE = 64
+
+# Pooled HTTP session shared by all image downloads: keep-alive connections
+# amortize the TCP + TLS handshake across requests to the same host
+http_session = requests.Session()
+http_adapter = HTTPAdapter(
+    pool_connections=64,
+    pool_maxsize=128,
+    max_retries=Retry(total=2, backoff_factor=0.1),
 )
-clip_tokenizer = open_clip.get_tokenizer('ViT-B-32')
-clip_model.eval()
-clip_model = clip_model.to(device)
-print(f"✓ Loaded in {time.time() - start:.2f}s")
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
+
+# Compile the hot towers so Inductor fuses the elementwise/LayerNorm/GELU ops
+# between the GEMMs; fall back to eager if compilation fails on this stack.
+# Pool workers skip this: they never serve requests from this process.
+if not IS_POOL_WORKER:
+    print("\nCompiling models with torch.compile...")
+    start = time.time()
+    eager_visual = clip_model.visual
+    try:
+        clip_model.visual = torch.compile(
+            clip_model.visual, mode='reduce-overhead', fullgraph=False
+        )
+        # Warm up the shapes we serve most so capture happens before traffic —
+        # backend failures also surface here, not at first request
+        with torch.inference_mode():
+            for warmup_batch in (1, IMAGE_CHUNK_SIZE):
+                clip_model.encode_image(to_clip_layout(
+                    torch.zeros(warmup_batch, 3, 224, 224, device=device, dtype=clip_dtype)
+                ))
+        print(f"✓ CLIP visual compiled in {time.time() - start:.2f}s")
+    except Exception as e:
+        # Unbind the broken compiled wrapper or every request re-hits the failure
+        clip_model.visual = eager_visual
+        print(f"⚠ torch.compile unavailable for CLIP, staying eager: {e}")
+
+    start = time.time()
+    st_transformer = sentence_model._first_module()
+    eager_auto_model = st_transformer.auto_model
+    try:
+        st_transformer.auto_model = torch.compile(
+            st_transformer.auto_model, mode='reduce-overhead', fullgraph=False
+        )
+        sentence_model.encode("warmup", convert_to_numpy=True)
+        print(f"✓ MiniLM compiled in {time.time() - start:.2f}s")
+    except Exception as e:
+        st_transformer.auto_model = eager_auto_model
+        print(f"⚠ torch.compile unavailable for MiniLM, staying eager: {e}")
+
+# Manually captured CUDA graph for the dominant single-image shape; replaying
+# it removes every per-kernel launch on that path. Capture is best-effort —
+# if it fails (e.g. the compiled tower already manages its own graphs),
+# encode_image stays on the regular path.
+clip_graph = None
+clip_graph_in = None
+clip_graph_out = None
+# The static input/output tensors are shared state: concurrent replays would
+# interleave copy/replay/read and hand requests each other's embeddings
+clip_graph_lock = threading.Lock()
+if device == "cuda" and not IS_POOL_WORKER:
+    try:
+        clip_graph_in = to_clip_layout(
+            torch.zeros(1, 3, 224, 224, device=device, dtype=clip_dtype)
+        )
+        warmup_stream = torch.cuda.Stream()
+        warmup_stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(warmup_stream), torch.inference_mode():
+            for _ in range(3):
+                clip_model.encode_image(clip_graph_in)
+        torch.cuda.current_stream().wait_stream(warmup_stream)
+        torch.cuda.synchronize()
+        clip_graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(clip_graph), torch.inference_mode():
+            clip_graph_out = clip_model.encode_image(clip_graph_in)
+        print("✓ Captured CUDA graph for single-image encode")
+    except Exception as e:
+        clip_graph = None
+        print(f"⚠ CUDA graph capture skipped: {e}")
+
+# GPU JPEG decode: nvJPEG plus a torchvision v2 pipeline keeps the whole
+# decode/resize/normalize chain on the device for single images. Non-JPEG
+# inputs (and CPU deployments) fall back to the PIL preprocess.
+gpu_preprocess = None
+if device == "cuda" and not IS_POOL_WORKER:
+    try:
+        from torchvision.io import decode_jpeg, ImageReadMode
+        from torchvision.transforms import v2 as tv2
+        from open_clip.constants import OPENAI_DATASET_MEAN, OPENAI_DATASET_STD
+        gpu_preprocess = tv2.Compose([
+            tv2.Resize(224, interpolation=tv2.InterpolationMode.BICUBIC, antialias=True),
+            tv2.CenterCrop(224),
+            tv2.ToDtype(torch.float32, scale=True),
+            tv2.Normalize(mean=OPENAI_DATASET_MEAN, std=OPENAI_DATASET_STD),
+        ])
+        print("✓ GPU JPEG decode enabled (nvJPEG)")
+    except Exception as e:
+        gpu_preprocess = None
+        print(f"⚠ GPU JPEG decode unavailable, using PIL: {e}")
+
 
 print("\n" + "=" * 70)
 print("SERVICE READY")
 print("=" * 70 + "\n")
 
 
-def encode_text(text):
+TEXT_CACHE_SIZE = 10000
+
+# Bounded LRU of text → embedding so repeated queries skip the model entirely
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+
+def text_cache_get(text):
+    """Return the cached embedding for text, or None on a miss."""
+    with _text_cache_lock:
+        vector = _text_cache.get(text)
+        if vector is not None:
+            _text_cache.move_to_end(text)
+        return vector
+
+
+def text_cache_put(text, vector):
+    """Insert an embedding, evicting the least recently used past the cap."""
+    with _text_cache_lock:
+        _text_cache[text] = vector
+        _text_cache.move_to_end(text)
+        while len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+
+
+def format_vectors(array, output_format):
+    """
+    Convert an embedding array for the response payload.
+
+    Default is a plain nested list. "base64_fp16" packs the array as FP16
+    bytes in base64 — half the payload size and no per-float Python object
+    construction on large batches.
+    """
+    if output_format == "base64_fp16":
+        return {
+            "data": base64.b64encode(array.astype(np.float16).tobytes()).decode("ascii"),
+            "dtype": "float16",
+            "shape": list(array.shape),
+        }
+    return array.tolist()
+
+
+SHORT_TEXT_CHARS = 256
+
+
+def encode_short_text(text):
+    """
+    Encode one short text by calling the MiniLM transformer directly.
+
+    The sentence-transformers wrapper adds batching/sorting overhead that is
+    pure waste at batch size 1: tokenize once, forward, mean-pool over the
+    attention mask, L2-normalize — the same Pooling + Normalize modules the
+    wrapper applies, so outputs are identical.
+    """
+    encoded = sentence_model.tokenizer(
+        text, return_tensors='pt', truncation=True,
+        max_length=sentence_model.max_seq_length
+    )
+    encoded = {k: v.to(device) for k, v in encoded.items()}
+    with torch.inference_mode():
+        token_embeddings = sentence_model._first_module().auto_model(**encoded)[0]
+        mask = encoded['attention_mask'].unsqueeze(-1).to(token_embeddings.dtype)
+        embedding = (token_embeddings * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
+    return embedding[0].cpu().numpy()
+
+
+def preprocess_image_bytes(content):
+    """
+    Decode + preprocess raw image bytes into a CLIP input tensor.
+
+    Tries the nvJPEG GPU path first so the 224x224 tensor never takes a
+    CPU→GPU trip; anything nvJPEG rejects goes through PIL.
+    """
+    if gpu_preprocess is not None:
+        try:
+            data = torch.frombuffer(bytearray(content), dtype=torch.uint8)
+            img = decode_jpeg(data, mode=ImageReadMode.RGB, device=device)
+            return to_clip_layout(gpu_preprocess(img).unsqueeze(0).to(dtype=clip_dtype))
+        except Exception:
+            pass  # not a JPEG, or nvJPEG rejected it — use the PIL path
+    img = Image.open(BytesIO(content)).convert('RGB')
+    return to_clip_layout(clip_preprocess(img).unsqueeze(0).to(device, dtype=clip_dtype))
+
+
+def encode_text(text, output_format=None):
     """
     Encode single text using Sentence Transformer.
 
     Args:
         text: String to encode
+        output_format: Optional "base64_fp16" for packed binary vectors
 
     Returns:
         Dict with vector, dimensions, model info
     """
-    start = time.time()
+    start = time.perf_counter_ns() if LATENCY_METRICS else 0
 
-    embedding = sentence_model.encode(text, convert_to_numpy=True)
-
-    latency_ms = (time.time() - start) * 1000
+    embedding = text_cache_get(text)
+    if embedding is None:
+        if len(text) <= SHORT_TEXT_CHARS:
+            embedding = encode_short_text(text)
+        else:
+            embedding = sentence_model.encode(text, convert_to_numpy=True)
+        text_cache_put(text, embedding)
 
-    return {
-        "vector": embedding.tolist(),
+    result = {
+        "vector": format_vectors(embedding, output_format),
         "dimensions": len(embedding),
         "model": "sentence-transformers/all-MiniLM-L6-v2",
-        "type": "text",
-        "latency_ms": round(latency_ms, 2)
+        "type": "text"
     }
+    if LATENCY_METRICS:
+        result["latency_ms"] = round((time.perf_counter_ns() - start) / 1e6, 2)
+    return result
 
 
-def encode_image(image_url):
+def encode_image(image_url, output_format=None):
     """
     Encode single image using CLIP.
 
     Args:
         image_url: URL of image to encode
+        output_format: Optional "base64_fp16" for packed binary vectors
 
     Returns:
         Dict with vector, dimensions, model info
     """
-    start = time.time()
+    start = time.perf_counter_ns() if LATENCY_METRICS else 0
 
     # Download image
-    response = requests.get(image_url, timeout=10)
+    response = http_session.get(image_url, timeout=10)
     response.raise_for_status()
-    img = Image.open(BytesIO(response.content)).convert('RGB')
 
-    # Preprocess
-    img_tensor = clip_preprocess(img).unsqueeze(0).to(device)
+    # Decode + preprocess (on GPU via nvJPEG when possible)
+    img_tensor = preprocess_image_bytes(response.content)
 
     # Encode
-    with torch.no_grad():
-        embedding = clip_model.encode_image(img_tensor)
+    with torch.inference_mode():
+        if clip_graph is not None:
+            with clip_graph_lock:
+                clip_graph_in.copy_(img_tensor)
+                clip_graph.replay()
+                embedding = clip_graph_out.float()
+        else:
+            embedding = clip_model.encode_image(img_tensor).float()
         embedding = embedding / embedding.norm(dim=-1, keepdim=True)
 
     vector = embedding.cpu().numpy()[0]
 
-    latency_ms = (time.time() - start) * 1000
-
-    return {
-        "vector": vector.tolist(),
+    result = {
+        "vector": format_vectors(vector, output_format),
         "dimensions": len(vector),
         "model": "openclip/ViT-B-32",
-        "type": "image",
-        "latency_ms": round(latency_ms, 2)
+        "type": "image"
     }
+    if LATENCY_METRICS:
+        result["latency_ms"] = round((time.perf_counter_ns() - start) / 1e6, 2)
+    return result
 
 
-def encode_batch_text(texts):
+def encode_batch_text(texts, output_format=None):
     """
     Encode multiple texts using Sentence Transformer.
 
     Args:
         texts: List of strings to encode
+        output_format: Optional "base64_fp16" for packed binary vectors
 
     Returns:
         Dict with vectors, count, dimensions, model info
     """
-    start = time.time()
-
-    embeddings = sentence_model.encode(texts, convert_to_numpy=True)
+    start = time.perf_counter_ns() if LATENCY_METRICS else 0
+
+    # Serve repeats from the LRU and only run the model on the misses
+    vectors_by_text = {}
+    misses = []
+    for text in texts:
+        if text in vectors_by_text:
+            continue
+        cached = text_cache_get(text)
+        vectors_by_text[text] = cached
+        if cached is None:
+            misses.append(text)
+
+    if misses:
+        pool = get_st_pool() if len(misses) >= MULTI_GPU_MIN_BATCH else None
+        if pool is not None:
+            new_embeddings = sentence_model.encode_multi_process(
+                misses, pool, batch_size=TEXT_ENCODE_BATCH_SIZE
+            )
+        else:
+            new_embeddings = sentence_model.encode(
+                misses, batch_size=TEXT_ENCODE_BATCH_SIZE, convert_to_numpy=True
+            )
+        for text, vector in zip(misses, new_embeddings):
+            text_cache_put(text, vector)
+            vectors_by_text[text] = vector
 
-    latency_ms = (time.time() - start) * 1000
+    embeddings = np.stack([vectors_by_text[text] for text in texts])
 
-    return {
-        "vectors": embeddings.tolist(),
+    result = {
+        "vectors": format_vectors(embeddings, output_format),
         "count": len(texts),
         "dimensions": embeddings.shape[1],
         "model": "sentence-transformers/all-MiniLM-L6-v2",
-        "type": "text",
-        "latency_ms": round(latency_ms, 2),
-        "avg_latency_per_item_ms": round(latency_ms / len(texts), 2)
+        "type": "text"
     }
+    if LATENCY_METRICS:
+        latency_ms = (time.perf_counter_ns() - start) / 1e6
+        result["latency_ms"] = round(latency_ms, 2)
+        result["avg_latency_per_item_ms"] = round(latency_ms / len(texts), 2)
+    return result
 
 
-def encode_batch_images(image_urls):
+def encode_batch_images(image_urls, output_format=None):
     """
     Encode multiple images using CLIP.
 
     Args:
         image_urls: List of image URLs to encode
+        output_format: Optional "base64_fp16" for packed binary vectors
 
     Returns:
         Dict with vectors, count, dimensions, model info
     """
-    start = time.time()
-
-    # Download and preprocess all images
-    images = []
-    for url in image_urls:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content)).convert('RGB')
-        images.append(clip_preprocess(img))
-
-    # Stack into batch
-    img_batch = torch.stack(images).to(device)
-
-    # Encode batch
-    with torch.no_grad():
-        embeddings = clip_model.encode_image(img_batch)
-        embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
-
-    vectors = embeddings.cpu().numpy()
-
-    latency_ms = (time.time() - start) * 1000
-
-    return {
-        "vectors": vectors.tolist(),
+    start = time.perf_counter_ns() if LATENCY_METRICS else 0
+
+    # Producer thread downloads + preprocesses the next chunk of images while
+    # the main thread encodes the current one, so network I/O hides behind
+    # GPU compute. Downloads within each chunk still fan out in parallel.
+    # Dedupe URLs first: repeats cost one download and one forward, and the
+    # vectors are scattered back into request order at the end
+    unique_urls = list(dict.fromkeys(image_urls))
+    chunks = [
+        unique_urls[i:i + IMAGE_CHUNK_SIZE]
+        for i in range(0, len(unique_urls), IMAGE_CHUNK_SIZE)
+    ]
+    work_queue = queue.Queue(maxsize=2)
+
+    def produce():
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, IMAGE_CHUNK_SIZE)
+            ) as pool:
+                for chunk in chunks:
+                    responses = list(
+                        pool.map(lambda url: http_session.get(url, timeout=10), chunk)
+                    )
+                    # Preprocess straight into one contiguous buffer
+                    # (pinned on CUDA): no per-image tensors, no stack
+                    # copy, one async H2D memcpy on the consumer side
+                    batch = torch.empty(
+                        (len(chunk), 3, 224, 224),
+                        dtype=torch.float32,
+                        pin_memory=(device == "cuda"),
+                    )
+                    for i, response in enumerate(responses):
+                        response.raise_for_status()
+                        img = Image.open(BytesIO(response.content)).convert('RGB')
+                        batch[i] = clip_preprocess(img)
+                    work_queue.put(batch)
+        except Exception as e:
+            work_queue.put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    chunk_vectors = []
+    try:
+        for _ in chunks:
+            batch = work_queue.get()
+            if isinstance(batch, Exception):
+                raise batch
+
+            # Copy on a side stream so the upload overlaps the previous encode
+            if copy_stream is not None:
+                with torch.cuda.stream(copy_stream):
+                    img_batch = batch.to(device, dtype=clip_dtype, non_blocking=True)
+                torch.cuda.current_stream().wait_stream(copy_stream)
+            else:
+                img_batch = batch.to(device)
+            img_batch = to_clip_layout(img_batch)
+
+            with torch.inference_mode():
+                embeddings = clip_model.encode_image(img_batch).float()
+                embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+            chunk_vectors.append(embeddings.cpu().numpy())
+    except Exception:
+        # The producer may be blocked on the bounded queue; keep draining
+        # until the thread exits so it and its pinned buffers are not leaked
+        while producer.is_alive():
+            try:
+                work_queue.get_nowait()
+            except queue.Empty:
+                time.sleep(0.01)
+        producer.join()
+        raise
+
+    producer.join()
+    unique_vectors = np.vstack(chunk_vectors)
+    index_of = {url: i for i, url in enumerate(unique_urls)}
+    vectors = unique_vectors[[index_of[url] for url in image_urls]]
+
+    result = {
+        "vectors": format_vectors(vectors, output_format),
         "count": len(image_urls),
         "dimensions": vectors.shape[1],
         "model": "openclip/ViT-B-32",
-        "type": "image",
-        "latency_ms": round(latency_ms, 2),
-        "avg_latency_per_item_ms": round(latency_ms / len(image_urls), 2)
+        "type": "image"
     }
+    if LATENCY_METRICS:
+        latency_ms = (time.perf_counter_ns() - start) / 1e6
+        result["latency_ms"] = round(latency_ms, 2)
+        result["avg_latency_per_item_ms"] = round(latency_ms / len(image_urls), 2)
+    return result
 
 
 def handler(event):
@@ -196,12 +592,16 @@ def handler(event):
     - Batch text: {"input": {"texts": ["text1", "text2", ...]}}
     - Batch images: {"input": {"image_urls": ["url1", "url2", ...]}}
 
+    Any request may add "format": "base64_fp16" to receive vectors as
+    base64-encoded FP16 bytes instead of JSON float lists.
+
     Returns:
         Dict with vectors and metadata
     """
 
     try:
         input_data = event.get("input", {})
+        output_format = input_data.get("format")
 
         # Validate input
         if not input_data:
@@ -217,24 +617,24 @@ def handler(event):
 
         # Route to appropriate encoder
         if "text" in input_data:
-            return encode_text(input_data["text"])
+            return encode_text(input_data["text"], output_format)
 
         elif "image_url" in input_data:
-            return encode_image(input_data["image_url"])
+            return encode_image(input_data["image_url"], output_format)
 
         elif "texts" in input_data:
             if not isinstance(input_data["texts"], list):
                 return {"error": "'texts' must be a list"}
             if len(input_data["texts"]) == 0:
                 return {"error": "'texts' list cannot be empty"}
-            return encode_batch_text(input_data["texts"])
+            return encode_batch_text(input_data["texts"], output_format)
 
         elif "image_urls" in input_data:
             if not isinstance(input_data["image_urls"], list):
                 return {"error": "'image_urls' must be a list"}
             if len(input_data["image_urls"]) == 0:
                 return {"error": "'image_urls' list cannot be empty"}
-            return encode_batch_images(input_data["image_urls"])
+            return encode_batch_images(input_data["image_urls"], output_format)
 
         else:
             return {
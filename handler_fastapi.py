@@ -9,24 +9,53 @@ Supports:
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
+import orjson
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
 import torch
 from sentence_transformers import SentenceTransformer
 import open_clip
 from PIL import Image
 import requests
+from requests.adapters import HTTPAdapter, Retry
+import numpy as np
+from collections import OrderedDict
 from io import BytesIO
+import concurrent.futures
+import queue
+import threading
+import atexit
 import time
 import uvicorn
 import os
 
-app = FastAPI(title="Vector Encoder API")
+class NumpyORJSONResponse(ORJSONResponse):
+    """
+    orjson response that serializes numpy arrays directly, no .tolist().
+
+    Endpoints must construct this themselves (`return NumpyORJSONResponse(...)`)
+    rather than returning raw dicts: FastAPI runs jsonable_encoder on plain
+    return values before any response class renders, and that step cannot
+    handle np.ndarray. Returning a Response instance skips it.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+app = FastAPI(title="Vector Encoder API", default_response_class=NumpyORJSONResponse)
 
 print("=" * 70)
 print("INITIALIZING VECTOR ENCODING SERVICE")
 print("=" * 70)
 
+# Inference-only service: allow TF32 tensor-core matmul and cuDNN autotuning
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+torch.backends.cudnn.benchmark = True
+
 # Check GPU availability
 device = "cuda" if torch.cuda.is_available() else "cpu"
 print(f"\nDevice: {device}")
@@ -34,6 +63,12 @@ if torch.cuda.is_available():
     print(f"GPU: {torch.cuda.get_device_name(0)}")
     print(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
 
+# torch.multiprocessing spawn workers (the multi-GPU text pool) re-execute
+# this module as "__mp_main__" during bootstrap; they only need the
+# SentenceTransformer, so every CLIP/compile/CUDA-graph init below is
+# skipped for them
+IS_POOL_WORKER = __name__ == "__mp_main__"
+
 # Load Sentence Transformer
 print("\n[1/2] Loading Sentence Transformer...")
 start = time.time()
@@ -42,22 +77,367 @@ sentence_model = sentence_model.to(device)
 print(f"✓ Loaded in {time.time() - start:.2f}s")
 print(f"  Dimensions: {sentence_model.get_sentence_embedding_dimension()}")
 
-# Load OpenCLIP
-print("\n[2/2] Loading OpenCLIP...")
-start = time.time()
-clip_model, _, clip_preprocess = open_clip.create_model_and_transforms(
-    'ViT-B-32',
-    pretrained='laion2b_s34b_b79k'
+# On CPU (cold-start fallback or CPU-only workers), dynamically quantize the
+# MiniLM Linear layers so matmuls run on INT8 fbgemm/qnnpack kernels —
+# accuracy loss is negligible for similarity use. GPU keeps FP16/TF32.
+if device == "cpu":
+    try:
+        st_module = sentence_model._first_module()
+        st_module.auto_model = torch.quantization.quantize_dynamic(
+            st_module.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        print("✓ MiniLM quantized to dynamic INT8 for CPU")
+    except Exception as e:
+        print(f"⚠ INT8 quantization unavailable, staying FP32: {e}")
+
+# The Rust "fast" tokenizer matters a lot for short inputs; warn loudly if
+# the slow Python one got loaded (usually a broken `tokenizers` install)
+if not getattr(sentence_model.tokenizer, "is_fast", False):
+    print("⚠ Slow Python tokenizer in use — install 'tokenizers' for the Rust one")
+
+# On multi-GPU workers, shard very large text batches across devices with
+# sentence-transformers' worker-process pool; small batches stay local.
+# The pool must NOT start at import: its workers are spawned via
+# torch.multiprocessing, re-import this module during bootstrap, and with a
+# top-level start would recursively reload models and spawn pools of their
+# own — so it is created lazily from request context on first use.
+MULTI_GPU_MIN_BATCH = 256
+st_pool = None
+st_pool_tried = False
+st_pool_lock = threading.Lock()
+
+
+def get_st_pool():
+    """Start (at most once) and return the multi-GPU encode pool, or None."""
+    global st_pool, st_pool_tried
+    if torch.cuda.device_count() <= 1:
+        return None
+    with st_pool_lock:
+        if not st_pool_tried:
+            st_pool_tried = True
+            try:
+                st_pool = sentence_model.start_multi_process_pool()
+                atexit.register(sentence_model.stop_multi_process_pool, st_pool)
+                print(f"✓ Multi-GPU encode pool across {torch.cuda.device_count()} GPUs")
+            except Exception as e:
+                print(f"⚠ Multi-GPU pool unavailable: {e}")
+        return st_pool
+
+# Load OpenCLIP — skipped in text pool workers, which never touch the image
+# paths and must not duplicate CLIP on the serving device
+clip_model = None
+clip_preprocess = None
+clip_dtype = torch.float16 if device == "cuda" else torch.float32
+if not IS_POOL_WORKER:
+    print("\n[2/2] Loading OpenCLIP...")
+    start = time.time()
+    # Prefer the safetensors checkpoint baked in by download_models.py: it is
+    # mmap'ed from the image layer instead of unpickled and eagerly copied,
+    # which cuts cold-start load time considerably
+    CLIP_SAFETENSORS = os.environ.get("CLIP_SAFETENSORS", "/app/clip_vit_b32.safetensors")
+    if os.path.exists(CLIP_SAFETENSORS):
+        from safetensors.torch import load_file
+        clip_model, _, clip_preprocess = open_clip.create_model_and_transforms('ViT-B-32')
+        clip_model.load_state_dict(load_file(CLIP_SAFETENSORS))
+        print(f"  (weights mmap'ed from {CLIP_SAFETENSORS})")
+    else:
+        clip_model, _, clip_preprocess = open_clip.create_model_and_transforms(
+            'ViT-B-32',
+            pretrained='laion2b_s34b_b79k'
+        )
+    clip_model.eval()
+    clip_model.requires_grad_(False)
+    clip_model = clip_model.to(device)
+
+    # FP16 weights on GPU: ViT-B/32 is GEMM-bound and maps straight onto
+    # tensor cores. The L2 normalization stays in FP32 for accuracy.
+    if device == "cuda":
+        clip_model = clip_model.half()
+        # NHWC strides for the patch-embedding conv; transformer blocks are
+        # layout-agnostic but inherit the cheaper input path
+        clip_model = clip_model.to(memory_format=torch.channels_last)
+    print(f"✓ Loaded in {time.time() - start:.2f}s")
+
+
+def to_clip_layout(tensor):
+    """Match CLIP's memory format (NHWC on GPU, default layout on CPU)."""
+    if device == "cuda":
+        return tensor.contiguous(memory_format=torch.channels_last)
+    return tensor
+
+# Dedicated stream for host→device copies so image uploads overlap GPU compute
+copy_stream = torch.cuda.Stream() if device == "cuda" and not IS_POOL_WORKER else None
+
+# Images per pipeline chunk in batch encoding
+IMAGE_CHUNK_SIZE = 8
+
+# Set LATENCY_METRICS=0 to strip timing from the hot path entirely
+LATENCY_METRICS = os.environ.get("LATENCY_METRICS", "1") != "0"
+
+# Sub-batch size for multi-text encodes. sentence-transformers sorts inputs
+# by token length and encodes in batches of this size, so heterogeneous
+# batches pad each sub-batch only to its own longest member
+TEXT_ENCODE_BATCH_SIZE = 64
+
+# Pooled HTTP session shared by all image downloads: keep-alive connections
+# amortize the TCP + TLS handshake across requests to the same host
+http_session = requests.Session()
+http_adapter = HTTPAdapter(
+    pool_connections=64,
+    pool_maxsize=128,
+    max_retries=Retry(total=2, backoff_factor=0.1),
 )
-clip_model.eval()
-clip_model = clip_model.to(device)
-print(f"✓ Loaded in {time.time() - start:.2f}s")
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
+
+# Micro-batching window for coalescing concurrent single-text requests
+TEXT_BATCH_WINDOW_S = 0.005
+TEXT_BATCH_MAX = 64
+
+# Worker pool that keeps blocking model calls off the event loop
+encode_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+# Serializes model forwards across executor threads: the compiled towers
+# (reduce-overhead = CUDA-graph trees with shared static buffers) are not
+# thread-safe — the same interleaved copy/replay/read hazard clip_graph_lock
+# guards on the manual graph. Downloads and preprocessing still overlap.
+model_lock = threading.Lock()
+
+# Queue feeding the text micro-batcher (created on the server's event loop),
+# and a strong reference to the consumer task so it cannot be collected
+text_batch_queue = None
+text_batcher_task = None
+
+# Compile the hot towers so Inductor fuses the elementwise/LayerNorm/GELU ops
+# between the GEMMs; fall back to eager if compilation fails on this stack.
+# Pool workers skip this: they never serve requests from this process.
+if not IS_POOL_WORKER:
+    print("\nCompiling models with torch.compile...")
+    start = time.time()
+    eager_visual = clip_model.visual
+    try:
+        clip_model.visual = torch.compile(
+            clip_model.visual, mode='reduce-overhead', fullgraph=False
+        )
+        # Warm up the shapes we serve most so capture happens before traffic —
+        # backend failures also surface here, not at first request
+        with torch.inference_mode():
+            for warmup_batch in (1, IMAGE_CHUNK_SIZE):
+                clip_model.encode_image(to_clip_layout(
+                    torch.zeros(warmup_batch, 3, 224, 224, device=device, dtype=clip_dtype)
+                ))
+        print(f"✓ CLIP visual compiled in {time.time() - start:.2f}s")
+    except Exception as e:
+        # Unbind the broken compiled wrapper or every request re-hits the failure
+        clip_model.visual = eager_visual
+        print(f"⚠ torch.compile unavailable for CLIP, staying eager: {e}")
+
+    start = time.time()
+    st_transformer = sentence_model._first_module()
+    eager_auto_model = st_transformer.auto_model
+    try:
+        st_transformer.auto_model = torch.compile(
+            st_transformer.auto_model, mode='reduce-overhead', fullgraph=False
+        )
+        sentence_model.encode("warmup", convert_to_numpy=True)
+        print(f"✓ MiniLM compiled in {time.time() - start:.2f}s")
+    except Exception as e:
+        st_transformer.auto_model = eager_auto_model
+        print(f"⚠ torch.compile unavailable for MiniLM, staying eager: {e}")
+
+# Manually captured CUDA graph for the dominant single-image shape; replaying
+# it removes every per-kernel launch on that path. Capture is best-effort —
+# if it fails (e.g. the compiled tower already manages its own graphs),
+# encode_image stays on the regular path.
+clip_graph = None
+clip_graph_in = None
+clip_graph_out = None
+# The static input/output tensors are shared state: concurrent replays would
+# interleave copy/replay/read and hand requests each other's embeddings
+clip_graph_lock = threading.Lock()
+if device == "cuda" and not IS_POOL_WORKER:
+    try:
+        clip_graph_in = to_clip_layout(
+            torch.zeros(1, 3, 224, 224, device=device, dtype=clip_dtype)
+        )
+        warmup_stream = torch.cuda.Stream()
+        warmup_stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(warmup_stream), torch.inference_mode():
+            for _ in range(3):
+                clip_model.encode_image(clip_graph_in)
+        torch.cuda.current_stream().wait_stream(warmup_stream)
+        torch.cuda.synchronize()
+        clip_graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(clip_graph), torch.inference_mode():
+            clip_graph_out = clip_model.encode_image(clip_graph_in)
+        print("✓ Captured CUDA graph for single-image encode")
+    except Exception as e:
+        clip_graph = None
+        print(f"⚠ CUDA graph capture skipped: {e}")
+
+# GPU JPEG decode: nvJPEG plus a torchvision v2 pipeline keeps the whole
+# decode/resize/normalize chain on the device for single images. Non-JPEG
+# inputs (and CPU deployments) fall back to the PIL preprocess.
+gpu_preprocess = None
+if device == "cuda" and not IS_POOL_WORKER:
+    try:
+        from torchvision.io import decode_jpeg, ImageReadMode
+        from torchvision.transforms import v2 as tv2
+        from open_clip.constants import OPENAI_DATASET_MEAN, OPENAI_DATASET_STD
+        gpu_preprocess = tv2.Compose([
+            tv2.Resize(224, interpolation=tv2.InterpolationMode.BICUBIC, antialias=True),
+            tv2.CenterCrop(224),
+            tv2.ToDtype(torch.float32, scale=True),
+            tv2.Normalize(mean=OPENAI_DATASET_MEAN, std=OPENAI_DATASET_STD),
+        ])
+        print("✓ GPU JPEG decode enabled (nvJPEG)")
+    except Exception as e:
+        gpu_preprocess = None
+        print(f"⚠ GPU JPEG decode unavailable, using PIL: {e}")
+
 
 print("\n" + "=" * 70)
 print("SERVICE READY")
 print("=" * 70 + "\n")
 
 
+TEXT_CACHE_SIZE = 10000
+
+# Bounded LRU of text → embedding so repeated queries skip the model entirely
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+
+def text_cache_get(text):
+    """Return the cached embedding for text, or None on a miss."""
+    with _text_cache_lock:
+        vector = _text_cache.get(text)
+        if vector is not None:
+            _text_cache.move_to_end(text)
+        return vector
+
+
+def text_cache_put(text, vector):
+    """Insert an embedding, evicting the least recently used past the cap."""
+    with _text_cache_lock:
+        _text_cache[text] = vector
+        _text_cache.move_to_end(text)
+        while len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+
+
+SHORT_TEXT_CHARS = 256
+
+
+def encode_short_text(text):
+    """
+    Encode one short text by calling the MiniLM transformer directly.
+
+    The sentence-transformers wrapper adds batching/sorting overhead that is
+    pure waste at batch size 1: tokenize once, forward, mean-pool over the
+    attention mask, L2-normalize — the same Pooling + Normalize modules the
+    wrapper applies, so outputs are identical.
+    """
+    encoded = sentence_model.tokenizer(
+        text, return_tensors='pt', truncation=True,
+        max_length=sentence_model.max_seq_length
+    )
+    encoded = {k: v.to(device) for k, v in encoded.items()}
+    with torch.inference_mode():
+        token_embeddings = sentence_model._first_module().auto_model(**encoded)[0]
+        mask = encoded['attention_mask'].unsqueeze(-1).to(token_embeddings.dtype)
+        embedding = (token_embeddings * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
+    return embedding[0].cpu().numpy()
+
+
+def preprocess_image_bytes(content):
+    """
+    Decode + preprocess raw image bytes into a CLIP input tensor.
+
+    Tries the nvJPEG GPU path first so the 224x224 tensor never takes a
+    CPU→GPU trip; anything nvJPEG rejects goes through PIL.
+    """
+    if gpu_preprocess is not None:
+        try:
+            data = torch.frombuffer(bytearray(content), dtype=torch.uint8)
+            img = decode_jpeg(data, mode=ImageReadMode.RGB, device=device)
+            return to_clip_layout(gpu_preprocess(img).unsqueeze(0).to(dtype=clip_dtype))
+        except Exception:
+            pass  # not a JPEG, or nvJPEG rejected it — use the PIL path
+    img = Image.open(BytesIO(content)).convert('RGB')
+    return to_clip_layout(clip_preprocess(img).unsqueeze(0).to(device, dtype=clip_dtype))
+
+
+async def text_batcher():
+    """
+    Coalesce concurrent single-text requests into one model call.
+
+    Pulls (text, future) pairs off the queue, waits up to TEXT_BATCH_WINDOW_S
+    (or TEXT_BATCH_MAX items) for company, runs one batched encode in the
+    worker pool, and fans the vectors back out to the waiting requests.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await text_batch_queue.get()]
+        deadline = loop.time() + TEXT_BATCH_WINDOW_S
+        while len(batch) < TEXT_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(text_batch_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [text for text, _ in batch]
+
+        def run_encode():
+            with model_lock:
+                if len(texts) == 1 and len(texts[0]) <= SHORT_TEXT_CHARS:
+                    # Lone short request: the direct path beats the wrapper
+                    return [encode_short_text(texts[0])]
+                return sentence_model.encode(
+                    texts, batch_size=TEXT_ENCODE_BATCH_SIZE, convert_to_numpy=True
+                )
+
+        try:
+            embeddings = await loop.run_in_executor(encode_executor, run_encode)
+            for (_, future), vector in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+def on_text_batcher_done(task):
+    """
+    Restart the batcher if it ever dies: a dead consumer silently hangs
+    every /encode/text request on a future that will never resolve.
+    """
+    global text_batcher_task
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        print(f"⚠ text batcher crashed, restarting: {exc!r}")
+        text_batcher_task = asyncio.get_running_loop().create_task(text_batcher())
+        text_batcher_task.add_done_callback(on_text_batcher_done)
+
+
+@app.on_event("startup")
+async def start_text_batcher():
+    """Launch the micro-batching consumer on the server's event loop"""
+    global text_batch_queue, text_batcher_task
+    text_batch_queue = asyncio.Queue()
+    # Hold a strong reference — the loop only keeps a weak one, and a
+    # garbage-collected batcher would strand all single-text traffic
+    text_batcher_task = asyncio.create_task(text_batcher())
+    text_batcher_task.add_done_callback(on_text_batcher_done)
+
+
 # Request models
 class TextRequest(BaseModel):
     text: str
@@ -95,17 +475,22 @@ async def ping():
 async def encode_text(request: TextRequest):
     """Encode single text"""
     try:
-        start = time.time()
-        embedding = sentence_model.encode(request.text, convert_to_numpy=True)
-        latency_ms = (time.time() - start) * 1000
-
-        return {
-            "vector": embedding.tolist(),
+        start = time.perf_counter_ns() if LATENCY_METRICS else 0
+        embedding = text_cache_get(request.text)
+        if embedding is None:
+            future = asyncio.get_running_loop().create_future()
+            await text_batch_queue.put((request.text, future))
+            embedding = await future
+            text_cache_put(request.text, embedding)
+        result = {
+            "vector": embedding,
             "dimensions": len(embedding),
             "model": "sentence-transformers/all-MiniLM-L6-v2",
-            "type": "text",
-            "latency_ms": round(latency_ms, 2)
+            "type": "text"
         }
+        if LATENCY_METRICS:
+            result["latency_ms"] = round((time.perf_counter_ns() - start) / 1e6, 2)
+        return NumpyORJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -114,29 +499,37 @@ async def encode_text(request: TextRequest):
 async def encode_image(request: ImageRequest):
     """Encode single image"""
     try:
-        start = time.time()
-
-        # Download image
-        response = requests.get(request.image_url, timeout=10)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content)).convert('RGB')
+        start = time.perf_counter_ns() if LATENCY_METRICS else 0
 
-        # Preprocess and encode
-        img_tensor = clip_preprocess(img).unsqueeze(0).to(device)
-        with torch.no_grad():
-            embedding = clip_model.encode_image(img_tensor)
-            embedding = embedding / embedding.norm(dim=-1, keepdim=True)
-
-        vector = embedding.cpu().numpy()[0]
-        latency_ms = (time.time() - start) * 1000
+        def run():
+            # Download image
+            response = http_session.get(request.image_url, timeout=10)
+            response.raise_for_status()
 
-        return {
-            "vector": vector.tolist(),
+            # Decode + preprocess (on GPU via nvJPEG when possible), then encode
+            img_tensor = preprocess_image_bytes(response.content)
+            with model_lock, torch.inference_mode():
+                if clip_graph is not None:
+                    with clip_graph_lock:
+                        clip_graph_in.copy_(img_tensor)
+                        clip_graph.replay()
+                        embedding = clip_graph_out.float()
+                else:
+                    embedding = clip_model.encode_image(img_tensor).float()
+                embedding = embedding / embedding.norm(dim=-1, keepdim=True)
+            return embedding.cpu().numpy()[0]
+
+        # Blocking I/O + GPU work runs in the pool; the loop keeps serving
+        vector = await asyncio.get_running_loop().run_in_executor(encode_executor, run)
+        result = {
+            "vector": vector,
             "dimensions": len(vector),
             "model": "openclip/ViT-B-32",
-            "type": "image",
-            "latency_ms": round(latency_ms, 2)
+            "type": "image"
         }
+        if LATENCY_METRICS:
+            result["latency_ms"] = round((time.perf_counter_ns() - start) / 1e6, 2)
+        return NumpyORJSONResponse(result)
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=400, detail=f"Failed to download image: {str(e)}")
     except Exception as e:
@@ -150,19 +543,51 @@ async def encode_batch_text(request: BatchTextRequest):
         if not request.texts:
             raise HTTPException(status_code=400, detail="texts list cannot be empty")
 
-        start = time.time()
-        embeddings = sentence_model.encode(request.texts, convert_to_numpy=True)
-        latency_ms = (time.time() - start) * 1000
-
-        return {
-            "vectors": embeddings.tolist(),
+        start = time.perf_counter_ns() if LATENCY_METRICS else 0
+
+        def run():
+            # Serve repeats from the LRU and only run the model on the misses
+            vectors_by_text = {}
+            misses = []
+            for text in request.texts:
+                if text in vectors_by_text:
+                    continue
+                cached = text_cache_get(text)
+                vectors_by_text[text] = cached
+                if cached is None:
+                    misses.append(text)
+
+            if misses:
+                pool = get_st_pool() if len(misses) >= MULTI_GPU_MIN_BATCH else None
+                if pool is not None:
+                    new_embeddings = sentence_model.encode_multi_process(
+                        misses, pool, batch_size=TEXT_ENCODE_BATCH_SIZE
+                    )
+                else:
+                    with model_lock:
+                        new_embeddings = sentence_model.encode(
+                            misses, batch_size=TEXT_ENCODE_BATCH_SIZE, convert_to_numpy=True
+                        )
+                for text, vector in zip(misses, new_embeddings):
+                    text_cache_put(text, vector)
+                    vectors_by_text[text] = vector
+
+            return np.stack([vectors_by_text[text] for text in request.texts])
+
+        # Blocking model work runs in the pool; the loop keeps serving
+        embeddings = await asyncio.get_running_loop().run_in_executor(encode_executor, run)
+        result = {
+            "vectors": embeddings,
             "count": len(request.texts),
             "dimensions": embeddings.shape[1],
             "model": "sentence-transformers/all-MiniLM-L6-v2",
-            "type": "text",
-            "latency_ms": round(latency_ms, 2),
-            "avg_latency_per_item_ms": round(latency_ms / len(request.texts), 2)
+            "type": "text"
         }
+        if LATENCY_METRICS:
+            latency_ms = (time.perf_counter_ns() - start) / 1e6
+            result["latency_ms"] = round(latency_ms, 2)
+            result["avg_latency_per_item_ms"] = round(latency_ms / len(request.texts), 2)
+        return NumpyORJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -174,40 +599,115 @@ async def encode_batch_images(request: BatchImageRequest):
         if not request.image_urls:
             raise HTTPException(status_code=400, detail="image_urls list cannot be empty")
 
-        start = time.time()
-
-        # Download and preprocess all images
-        images = []
-        for url in request.image_urls:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            img = Image.open(BytesIO(response.content)).convert('RGB')
-            images.append(clip_preprocess(img))
-
-        # Stack and encode
-        img_batch = torch.stack(images).to(device)
-        with torch.no_grad():
-            embeddings = clip_model.encode_image(img_batch)
-            embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+        start = time.perf_counter_ns() if LATENCY_METRICS else 0
 
-        vectors = embeddings.cpu().numpy()
-        latency_ms = (time.time() - start) * 1000
+        def run():
+            return run_image_pipeline(request.image_urls)
 
-        return {
-            "vectors": vectors.tolist(),
+        # The whole pipeline (downloads + GPU encode) runs in the pool
+        vectors = await asyncio.get_running_loop().run_in_executor(encode_executor, run)
+        result = {
+            "vectors": vectors,
             "count": len(request.image_urls),
             "dimensions": vectors.shape[1],
             "model": "openclip/ViT-B-32",
-            "type": "image",
-            "latency_ms": round(latency_ms, 2),
-            "avg_latency_per_item_ms": round(latency_ms / len(request.image_urls), 2)
+            "type": "image"
         }
+        if LATENCY_METRICS:
+            latency_ms = (time.perf_counter_ns() - start) / 1e6
+            result["latency_ms"] = round(latency_ms, 2)
+            result["avg_latency_per_item_ms"] = round(latency_ms / len(request.image_urls), 2)
+        return NumpyORJSONResponse(result)
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=400, detail=f"Failed to download image: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def run_image_pipeline(image_urls):
+    """
+    Chunked download/encode pipeline for a batch of image URLs.
+
+    A producer thread downloads + preprocesses the next chunk of images
+    while the caller's thread encodes the current one, so network I/O hides
+    behind GPU compute. Downloads within each chunk fan out in parallel.
+    Returns the stacked, L2-normalized vectors as a numpy array.
+    """
+    # Dedupe URLs first: repeats cost one download and one forward, and the
+    # vectors are scattered back into request order at the end
+    unique_urls = list(dict.fromkeys(image_urls))
+    chunks = [
+        unique_urls[i:i + IMAGE_CHUNK_SIZE]
+        for i in range(0, len(unique_urls), IMAGE_CHUNK_SIZE)
+    ]
+    work_queue = queue.Queue(maxsize=2)
+
+    def produce():
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, IMAGE_CHUNK_SIZE)
+            ) as pool:
+                for chunk in chunks:
+                    responses = list(
+                        pool.map(lambda url: http_session.get(url, timeout=10), chunk)
+                    )
+                    # Preprocess straight into one contiguous buffer
+                    # (pinned on CUDA): no per-image tensors, no stack
+                    # copy, one async H2D memcpy on the consumer side
+                    batch = torch.empty(
+                        (len(chunk), 3, 224, 224),
+                        dtype=torch.float32,
+                        pin_memory=(device == "cuda"),
+                    )
+                    for i, response in enumerate(responses):
+                        response.raise_for_status()
+                        img = Image.open(BytesIO(response.content)).convert('RGB')
+                        batch[i] = clip_preprocess(img)
+                    work_queue.put(batch)
+        except Exception as e:
+            work_queue.put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    chunk_vectors = []
+    try:
+        for _ in chunks:
+            batch = work_queue.get()
+            if isinstance(batch, Exception):
+                raise batch
+
+            # Copy on a side stream so the upload overlaps the previous encode
+            if copy_stream is not None:
+                with torch.cuda.stream(copy_stream):
+                    img_batch = batch.to(device, dtype=clip_dtype, non_blocking=True)
+                torch.cuda.current_stream().wait_stream(copy_stream)
+            else:
+                img_batch = batch.to(device)
+            img_batch = to_clip_layout(img_batch)
+
+            with model_lock, torch.inference_mode():
+                embeddings = clip_model.encode_image(img_batch).float()
+                embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+            chunk_vectors.append(embeddings.cpu().numpy())
+    except Exception:
+        # The producer may be blocked on the bounded queue; keep draining
+        # until the thread exits so it and its pinned buffers are not leaked
+        while producer.is_alive():
+            try:
+                work_queue.get_nowait()
+            except queue.Empty:
+                time.sleep(0.01)
+        producer.join()
+        raise
+
+    producer.join()
+    unique_vectors = np.vstack(chunk_vectors)
+    index_of = {url: i for i, url in enumerate(unique_urls)}
+    return unique_vectors[[index_of[url] for url in image_urls]]
+
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     print(f"Starting FastAPI server on 0.0.0.0:{port}")
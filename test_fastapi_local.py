@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Local test script for the FastAPI handler.
+Exercises the HTTP endpoints in-process with Starlette's TestClient, so the
+full request path — routing, micro-batcher, numpy JSON serialization — runs
+without a live server.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import json
+
+from fastapi.testclient import TestClient
+
+from handler_fastapi import app
+
+def test_health(client):
+    """Test health check endpoint"""
+    print("\n" + "="*50)
+    print("TEST 1: Health Check")
+    print("="*50)
+
+    response = client.get("/")
+    print(json.dumps(response.json(), indent=2))
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    print("✓ PASSED")
+    return True
+
+def test_single_text(client):
+    """Test single text encoding over HTTP"""
+    print("\n" + "="*50)
+    print("TEST 2: Single Text Encoding")
+    print("="*50)
+
+    response = client.post("/encode/text", json={"text": "red leather shoes"})
+    assert response.status_code == 200, response.text
+
+    result = response.json()
+    print(json.dumps({k: v for k, v in result.items() if k != "vector"}, indent=2))
+
+    # The vector must survive JSON serialization as a plain float list
+    assert result["dimensions"] == 384
+    assert isinstance(result["vector"], list)
+    assert len(result["vector"]) == 384
+    print("✓ PASSED")
+    return True
+
+def test_batch_text(client):
+    """Test batch text encoding over HTTP"""
+    print("\n" + "="*50)
+    print("TEST 3: Batch Text Encoding")
+    print("="*50)
+
+    response = client.post("/encode/batch/text", json={
+        "texts": [
+            "red leather shoes",
+            "blue cotton jacket",
+            "red leather shoes"
+        ]
+    })
+    assert response.status_code == 200, response.text
+
+    result = response.json()
+    print(json.dumps({k: v for k, v in result.items() if k != "vectors"}, indent=2))
+    print(f"  vectors: [{len(result.get('vectors', []))} vectors returned]")
+
+    assert result["count"] == 3
+    assert len(result["vectors"]) == 3
+    assert len(result["vectors"][0]) == 384
+    # Duplicate inputs must produce identical vectors in their original slots
+    assert result["vectors"][0] == result["vectors"][2]
+    print("✓ PASSED")
+    return True
+
+if __name__ == "__main__":
+    print("="*50)
+    print("LOCAL FASTAPI HANDLER TEST")
+    print("="*50)
+
+    results = {
+        "health": False,
+        "single_text": False,
+        "batch_text": False
+    }
+
+    # The context manager runs the startup hooks (text micro-batcher)
+    with TestClient(app) as client:
+        try:
+            results["health"] = test_health(client)
+            results["single_text"] = test_single_text(client)
+            results["batch_text"] = test_batch_text(client)
+        except Exception as e:
+            print(f"\n\n✗ Test failed: {e}")
+            import traceback
+            traceback.print_exc()
+
+    # Summary
+    print("\n" + "="*50)
+    print("TEST SUMMARY")
+    print("="*50)
+    for test_name, passed in results.items():
+        status = "✓ PASSED" if passed else "✗ FAILED"
+        print(f"  {test_name:20s}: {status}")
+
+    total = len(results)
+    passed = sum(1 for v in results.values() if v)
+    print(f"\nTotal: {passed}/{total} tests passed")
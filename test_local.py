@@ -57,6 +57,58 @@ def test_batch_text():
     print("✓ PASSED")
     return True
 
+def test_batch_text_duplicates():
+    """Test batch text encoding with duplicate inputs"""
+    print("\n" + "="*50)
+    print("TEST: Batch Text Deduplication")
+    print("="*50)
+
+    event = {
+        "input": {
+            "texts": [
+                "red leather shoes",
+                "blue cotton jacket",
+                "red leather shoes"
+            ]
+        }
+    }
+
+    result = handler(event)
+    print(json.dumps({k: v for k, v in result.items() if k != "vectors"}, indent=2))
+
+    assert result["count"] == 3
+    assert len(result["vectors"]) == 3
+    # Duplicate inputs must produce identical vectors in their original slots
+    assert result["vectors"][0] == result["vectors"][2]
+    print("✓ PASSED")
+    return True
+
+def test_base64_format():
+    """Test base64_fp16 output format"""
+    print("\n" + "="*50)
+    print("TEST: Base64 FP16 Output Format")
+    print("="*50)
+
+    event = {
+        "input": {
+            "text": "red leather shoes",
+            "format": "base64_fp16"
+        }
+    }
+
+    result = handler(event)
+    print(json.dumps({k: v for k, v in result.items() if k != "vector"}, indent=2))
+
+    assert "vector" in result
+    assert result["vector"]["dtype"] == "float16"
+    assert result["vector"]["shape"] == [384]
+
+    import base64
+    raw = base64.b64decode(result["vector"]["data"])
+    assert len(raw) == 384 * 2  # 384 dims × 2 bytes per fp16
+    print("✓ PASSED")
+    return True
+
 def test_single_image():
     """Test single image encoding"""
     print("\n" + "="*50)
@@ -118,6 +170,8 @@ if __name__ == "__main__":
     results = {
         "single_text": False,
         "batch_text": False,
+        "batch_text_duplicates": False,
+        "base64_format": False,
         "single_image": False,
         "batch_images": False
     }
@@ -125,6 +179,8 @@ if __name__ == "__main__":
     try:
         results["single_text"] = test_single_text()
         results["batch_text"] = test_batch_text()
+        results["batch_text_duplicates"] = test_batch_text_duplicates()
+        results["base64_format"] = test_base64_format()
         results["single_image"] = test_single_image()
         results["batch_images"] = test_batch_images()
     except Exception as e: